@@ -1,70 +1,233 @@
 import os
+import re
+import orjson
+import hashlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
 import math
+import numpy as np
+
+# Number of grid points searched concurrently
+MAX_SEARCH_WORKERS = 16
+
+# Radius of each grid point's Places search
+SEARCH_RADIUS_METERS = 16000
+METERS_PER_MILE = 1609.344
+
+# Earth's radius, and the length of one degree of latitude, in miles. The
+# grid is laid out with the same sphere the haversine checks measure on
+EARTH_RADIUS_MILES = 3959
+MILES_PER_DEGREE = 2 * math.pi * EARTH_RADIUS_MILES / 360
+
+# Hex spacing as a fraction of the gap-free sqrt(3) * radius, so float32
+# rounding and the flat-grid approximation can't open slivers between cells
+GRID_SPACING_MARGIN = 0.95
+
+# How long cached Places responses stay valid
+PLACES_CACHE_TTL_SECONDS = 7 * 86400
+
+
+# Most zipcodes kept in the geocode cache before the least recently used
+# ones are evicted
+GEOCODE_CACHE_SIZE = 4096
+
+# (api_key, zipcode) -> (lat, lng); module level so the cache is shared
+# across PlacesSearcher instances (main.py builds one per request)
+_geocode_cache = OrderedDict()
+
+
+def _haversine_scalar(lat1, lon1, lat2, lon2):
+    """Haversine distance in miles for a single pair of points"""
+    R = EARTH_RADIUS_MILES
+    
+    lat1_rad = math.radians(lat1)
+    lat2_rad = math.radians(lat2)
+    delta_lat = math.radians(lat2 - lat1)
+    delta_lon = math.radians(lon2 - lon1)
+    
+    a = (math.sin(delta_lat / 2) ** 2 +
+         math.cos(lat1_rad) * math.cos(lat2_rad) *
+         math.sin(delta_lon / 2) ** 2)
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+    
+    return R * c
+
+
+def _hex_grid_offsets(radius_miles, spacing_miles):
+    """
+    Offsets in miles (x east, y north) of a hexagonal lattice covering a
+    square around the center. Odd rows are shifted by half a spacing.
+    """
+    row_spacing = spacing_miles * math.sqrt(3) / 2
+    num_rows = int(math.ceil(radius_miles / row_spacing))
+    num_cols = int(math.ceil(radius_miles / spacing_miles)) + 1
+    
+    I, J = np.meshgrid(
+        np.arange(-num_rows, num_rows + 1),
+        np.arange(-num_cols, num_cols + 1),
+        indexing='ij'
+    )
+    
+    # FP32 is ample for mile-scale grid offsets and halves the work per ufunc
+    y = (I * row_spacing).astype(np.float32)
+    x = ((J + (I % 2) * 0.5) * spacing_miles).astype(np.float32)
+    
+    return x.ravel(), y.ravel()
+
+
+def _haversine_term(lat1, lon1, lat2, lon2):
+    """Haversine term a = sin^2(dlat/2) + cos(lat1)cos(lat2)sin^2(dlon/2)"""
+    # Scalars (e.g. the search center) take the dtype of the array inputs
+    lat2 = np.asarray(lat2)
+    lon2 = np.asarray(lon2)
+    lat1 = lat2.dtype.type(lat1)
+    lon1 = lon2.dtype.type(lon1)
+    
+    lat1_rad = np.radians(lat1)
+    lat2_rad = np.radians(lat2)
+    delta_lat = np.radians(lat2 - lat1)
+    delta_lon = np.radians(lon2 - lon1)
+    
+    return (np.sin(delta_lat / 2) ** 2 +
+            np.cos(lat1_rad) * np.cos(lat2_rad) *
+            np.sin(delta_lon / 2) ** 2)
+
+
+def _haversine_vec(lat1, lon1, lat2, lon2):
+    """Vectorized haversine distance in miles; accepts scalars or arrays"""
+    R = EARTH_RADIUS_MILES
+    
+    a = _haversine_term(lat1, lon1, lat2, lon2)
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+    
+    return R * c
+
+
+def _within_radius(center_lat, center_lng, lats, lngs, radius_miles):
+    """
+    Boolean mask of points within radius_miles of the center.
+    Distance is monotonic in the haversine term, so comparing the term
+    against a precomputed threshold skips the sqrt/arctan2 per point.
+    """
+    R = EARTH_RADIUS_MILES
+    
+    a = _haversine_term(center_lat, center_lng, lats, lngs)
+    
+    if radius_miles >= math.pi * R:
+        return np.ones(a.shape, dtype=bool)
+    
+    # Match the threshold's dtype to a so FP32 inputs aren't upcast
+    threshold = a.dtype.type(math.sin(radius_miles / (2 * R)) ** 2)
+    return a <= threshold
+
 
 class PlacesSearcher:
-    def __init__(self, api_key):
+    # "..., City, ST 12345, USA" (zip optional) at the end of a formattedAddress
+    _us_address_re = re.compile(r'(?:^|,)\s*([^,]+),\s*([A-Z]{2})(?:\s+(\d{5})(?:-\d{4})?)?,\s*USA$')
+    
+    def __init__(self, api_key, seen_places=None, places_cache=None):
         self.api_key = api_key
         self.results = []
+        # Optional SeenPlaces store; places recorded there are skipped
+        self.seen_places = seen_places
+        # In-radius places the last search_area left out as already exported
+        self.skipped_seen = 0
+        # Optional on-disk cache of search responses, for cheap reruns. It is
+        # opened once by the app and only used from the calling thread
+        self.places_cache = places_cache
         self.base_url = "https://places.googleapis.com/v1/places:searchNearby"
+        self.text_search_url = "https://places.googleapis.com/v1/places:searchText"
         self.geocode_url = "https://maps.googleapis.com/maps/api/geocode/json"
+        
+        # Request pieces shared by every grid point search
+        self.search_headers = {
+            'Content-Type': 'application/json',
+            'X-Goog-Api-Key': self.api_key,
+            'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.nationalPhoneNumber,places.websiteUri,places.location'
+        }
+        self.body_templates = {}
+        
+        # Reuse TCP/TLS connections across the many Places API calls and
+        # retry transient failures (searches are read-only, so POST is safe)
+        self.session = requests.Session()
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=frozenset(['GET', 'POST'])
+        )
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=retry)
+        self.session.mount('https://', adapter)
+    
+    def grid_spacing_miles(self):
+        """
+        Hex grid spacing at which the search circles tile the plane
+        without gaps (circle radius * sqrt(3)), less a small safety margin
+        """
+        return SEARCH_RADIUS_METERS / METERS_PER_MILE * math.sqrt(3) * GRID_SPACING_MARGIN
     
-    def calculate_grid_points(self, center_lat, center_lng, radius_miles, grid_spacing_miles=10):
+    def calculate_grid_points(self, center_lat, center_lng, radius_miles, grid_spacing_miles=None):
         """
         Calculate grid points to cover the search area.
+        Points lie on a hexagonal lattice so neighbouring search circles
+        overlap far less than on a square grid.
         """
-        lat_per_mile = 1 / 69.0
-        lng_per_mile = 1 / (69.0 * math.cos(math.radians(center_lat)))
+        if grid_spacing_miles is None:
+            grid_spacing_miles = self.grid_spacing_miles()
         
-        grid_points = []
-        num_points = max(1, int(radius_miles / grid_spacing_miles))
+        lat_per_mile = np.float32(1 / MILES_PER_DEGREE)
         
-        for i in range(-num_points, num_points + 1):
-            for j in range(-num_points, num_points + 1):
-                lat_offset = i * grid_spacing_miles * lat_per_mile
-                lng_offset = j * grid_spacing_miles * lng_per_mile
-                
-                new_lat = center_lat + lat_offset
-                new_lng = center_lng + lng_offset
-                
-                distance = self.haversine_distance(
-                    center_lat, center_lng, new_lat, new_lng
-                )
-                
-                if distance <= radius_miles:
-                    grid_points.append((new_lat, new_lng))
+        # Keep every point whose search circle reaches into the area, not
+        # just points inside it, so the edge of the area is covered too
+        reach_miles = radius_miles + SEARCH_RADIUS_METERS / METERS_PER_MILE
+        
+        # Build the whole lattice at once and mask by distance; the grid
+        # stays in FP32 (~1 m precision), which is plenty for 10-mile cells
+        x, y = _hex_grid_offsets(reach_miles, grid_spacing_miles)
+        
+        # Longitude degrees shrink with each row's own latitude, so rows far
+        # north or south of the center keep their east-west spacing
+        new_lat = np.float32(center_lat) + y * lat_per_mile
+        lng_per_mile = 1 / (np.float32(MILES_PER_DEGREE) * np.cos(np.radians(new_lat)))
+        new_lng = np.float32(center_lng) + x * lng_per_mile
+        
+        mask = _within_radius(center_lat, center_lng, new_lat, new_lng, reach_miles)
+        
+        grid_points = list(zip(new_lat[mask].tolist(), new_lng[mask].tolist()))
         
         return grid_points
     
     def haversine_distance(self, lat1, lon1, lat2, lon2):
         """Calculate distance between two points in miles"""
-        R = 3959  # Earth's radius in miles
-        
-        lat1_rad = math.radians(lat1)
-        lat2_rad = math.radians(lat2)
-        delta_lat = math.radians(lat2 - lat1)
-        delta_lon = math.radians(lon2 - lon1)
-        
-        a = (math.sin(delta_lat / 2) ** 2 +
-             math.cos(lat1_rad) * math.cos(lat2_rad) *
-             math.sin(delta_lon / 2) ** 2)
-        c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
-        
-        return R * c
+        return _haversine_scalar(lat1, lon1, lat2, lon2)
     
     def geocode_zipcode(self, zipcode):
         """Convert zipcode to lat/lng coordinates using Geocoding API"""
+        zipcode = zipcode.strip()
+        cache_key = (self.api_key, zipcode)
+        
+        if cache_key in _geocode_cache:
+            _geocode_cache.move_to_end(cache_key)
+            return _geocode_cache[cache_key]
+        
         try:
             params = {
                 'address': zipcode,
                 'key': self.api_key
             }
-            response = requests.get(self.geocode_url, params=params)
-            data = response.json()
+            response = self.session.get(self.geocode_url, params=params, timeout=10)
+            data = orjson.loads(response.content)
             
             if data['status'] == 'OK' and data['results']:
                 location = data['results'][0]['geometry']['location']
+                # Only successful lookups are cached
+                _geocode_cache[cache_key] = location['lat'], location['lng']
+                if len(_geocode_cache) > GEOCODE_CACHE_SIZE:
+                    _geocode_cache.popitem(last=False)
                 return location['lat'], location['lng']
             else:
                 print(f"Geocoding error: {data.get('status')}")
@@ -73,53 +236,17 @@ class PlacesSearcher:
             print(f"Error geocoding zipcode: {e}")
             return None, None
     
-    def search_nearby(self, keyword, lat, lng, radius_meters=16000):
+    def search_nearby(self, keyword, lat, lng, radius_meters=SEARCH_RADIUS_METERS):
         """
         Search for places near a location using NEW Places API
         """
         try:
-            headers = {
-                'Content-Type': 'application/json',
-                'X-Goog-Api-Key': self.api_key,
-                'X-Goog-FieldMask': 'places.id,places.displayName,places.formattedAddress,places.nationalPhoneNumber,places.websiteUri,places.location,places.addressComponents'
-            }
-            
-            body = {
-                "includedTypes": ["veterinary_care"],
-                "maxResultCount": 20,
-                "locationRestriction": {
-                    "circle": {
-                        "center": {
-                            "latitude": lat,
-                            "longitude": lng
-                        },
-                        "radius": radius_meters
-                    }
-                }
-            }
-            
-            # If keyword is not "veterinary clinic", use text search instead
-            if keyword.lower() != "veterinary clinic":
-                body = {
-                    "textQuery": keyword,
-                    "maxResultCount": 20,
-                    "locationBias": {
-                        "circle": {
-                            "center": {
-                                "latitude": lat,
-                                "longitude": lng
-                            },
-                            "radius": radius_meters
-                        }
-                    }
-                }
-                # Use searchText endpoint instead
-                search_url = "https://places.googleapis.com/v1/places:searchText"
-                response = requests.post(search_url, headers=headers, json=body)
-            else:
-                response = requests.post(self.base_url, headers=headers, json=body)
+            search_url, body_template = self.search_request_template(keyword, radius_meters)
+            response = self.session.post(
+                search_url, headers=self.search_headers, data=body_template % (lat, lng)
+            )
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if 'places' in data:
                 return data['places']
@@ -131,26 +258,56 @@ class PlacesSearcher:
             print(f"Error searching places: {e}")
             return []
     
-    def parse_address_components(self, address_components):
-        """Extract city, state, zip from address components"""
-        city = ''
-        state = ''
-        zipcode = ''
-        
-        if not address_components:
-            return city, state, zipcode
+    def search_cache_key(self, keyword, lat, lng, radius_meters=SEARCH_RADIUS_METERS):
+        """Key under which a grid point's search response is cached"""
+        return hashlib.blake2b(
+            f'{keyword}|{lat:.5f}|{lng:.5f}|{radius_meters}'.encode(),
+            digest_size=16
+        ).digest()
+    
+    def search_request_template(self, keyword, radius_meters):
+        """
+        Return (url, body template) for a keyword, building it once.
+        The template is the serialized JSON body with %-placeholders for
+        latitude and longitude, so each search only formats two floats.
+        """
+        key = (keyword, radius_meters)
         
-        for component in address_components:
-            types = component.get('types', [])
+        if key not in self.body_templates:
+            circle = {
+                "circle": {
+                    "center": {
+                        "latitude": "__LAT__",
+                        "longitude": "__LNG__"
+                    },
+                    "radius": radius_meters
+                }
+            }
+            
+            # If keyword is not "veterinary clinic", use text search instead
+            if keyword.lower() != "veterinary clinic":
+                body = {
+                    "textQuery": keyword,
+                    "maxResultCount": 20,
+                    "locationBias": circle
+                }
+                search_url = self.text_search_url
+            else:
+                body = {
+                    "includedTypes": ["veterinary_care"],
+                    "maxResultCount": 20,
+                    "locationRestriction": circle
+                }
+                search_url = self.base_url
             
-            if 'locality' in types:
-                city = component.get('longText', '')
-            elif 'administrative_area_level_1' in types:
-                state = component.get('shortText', '')
-            elif 'postal_code' in types:
-                zipcode = component.get('longText', '')
+            # The template is UTF-8 bytes, sent as-is after formatting
+            template = (orjson.dumps(body)
+                        .replace(b'%', b'%%')
+                        .replace(b'"__LAT__"', b'%.7f')
+                        .replace(b'"__LNG__"', b'%.7f'))
+            self.body_templates[key] = (search_url, template)
         
-        return city, state, zipcode
+        return self.body_templates[key]
     
     def search_area(self, keyword, zipcode, radius_miles):
         """
@@ -158,6 +315,7 @@ class PlacesSearcher:
         Returns list of unique places with details
         """
         print(f"Starting search for '{keyword}' within {radius_miles} miles of {zipcode}")
+        self.skipped_seen = 0
         
         # Get center coordinates
         center_lat, center_lng = self.geocode_zipcode(zipcode)
@@ -171,67 +329,121 @@ class PlacesSearcher:
         grid_points = self.calculate_grid_points(center_lat, center_lng, radius_miles)
         print(f"Searching {len(grid_points)} grid points...")
         
-        # Track unique places by place_id
-        unique_places = {}
+        # Search grid points concurrently, then merge results on this thread
+        def search_point(point):
+            lat, lng = point
+            return self.search_nearby(keyword, lat, lng)
         
-        # Search each grid point
-        for idx, (lat, lng) in enumerate(grid_points, 1):
-            print(f"Searching grid point {idx}/{len(grid_points)}...")
-            
-            places = self.search_nearby(keyword, lat, lng, radius_meters=16000)
+        results = [None] * len(grid_points)
+        
+        # The response cache is read and written on this thread only, so its
+        # SQLite connection is never opened from the worker threads
+        if self.places_cache is not None:
+            cache_keys = [self.search_cache_key(keyword, lat, lng) for lat, lng in grid_points]
+            results = [self.places_cache.get(key) for key in cache_keys]
+        
+        to_search = [idx for idx, places in enumerate(results) if places is None]
+        if len(to_search) < len(grid_points):
+            print(f"Loaded {len(grid_points) - len(to_search)} grid points from cache")
+        
+        with ThreadPoolExecutor(max_workers=MAX_SEARCH_WORKERS) as executor:
+            searches = executor.map(search_point, [grid_points[idx] for idx in to_search])
             
+            # Report progress here, not in the workers, so lines don't interleave
+            for count, (idx, places) in enumerate(zip(to_search, searches), 1):
+                print(f"Searched grid point {count}/{len(to_search)}")
+                results[idx] = places
+                
+                if places and self.places_cache is not None:
+                    self.places_cache.set(cache_keys[idx], places, expire=PLACES_CACHE_TTL_SECONDS)
+        
+        # Collect unique candidates as parallel columns (ids, coordinates,
+        # raw records) so the radius check can run on arrays
+        seen_ids = set()
+        place_ids = []
+        place_lats = []
+        place_lngs = []
+        place_records = []
+        
+        for places in results:
             for place in places:
                 place_id = place.get('id')
                 
-                if place_id in unique_places:
+                if place_id in seen_ids:
                     continue
                 
-                # Check if place is within target radius
                 place_lat = place.get('location', {}).get('latitude')
                 place_lng = place.get('location', {}).get('longitude')
                 
                 if not place_lat or not place_lng:
                     continue
                 
-                distance = self.haversine_distance(
-                    center_lat, center_lng, place_lat, place_lng
-                )
-                
-                if distance <= radius_miles:
-                    # Parse address
-                    address_components = place.get('addressComponents', [])
-                    city, state, zipcode_parsed = self.parse_address_components(address_components)
-                    
-                    # Build lead data
-                    lead_data = {
-                        'name': place.get('displayName', {}).get('text', ''),
-                        'address': place.get('formattedAddress', ''),
-                        'city': city,
-                        'state': state,
-                        'zip': zipcode_parsed,
-                        'phone': place.get('nationalPhoneNumber', ''),
-                        'website': place.get('websiteUri', ''),
-                        'place_id': place_id,
-                        'email': '',
-                        'facebook': '',
-                        'instagram': '',
-                        'linkedin': '',
-                        'twitter': ''
-                    }
-                    
-                    unique_places[place_id] = lead_data
-        
-        print(f"Found {len(unique_places)} unique places")
-        return list(unique_places.values())
+                seen_ids.add(place_id)
+                place_ids.append(place_id)
+                place_lats.append(place_lat)
+                place_lngs.append(place_lng)
+                place_records.append(place)
+        
+        # Check every candidate against the target radius in one pass
+        keep = _within_radius(
+            center_lat, center_lng, np.array(place_lats), np.array(place_lngs), radius_miles
+        )
+        
+        # Skip places already exported by earlier searches
+        if self.seen_places is not None:
+            already_seen = self.seen_places.filter_seen(place_ids)
+            if already_seen:
+                unseen = np.array([place_id not in already_seen for place_id in place_ids], dtype=bool)
+                self.skipped_seen = int(np.count_nonzero(keep & ~unseen))
+                print(f"Skipping {self.skipped_seen} previously exported places")
+                keep &= unseen
+        
+        in_radius = np.flatnonzero(keep)
+        
+        leads = []
+        
+        for idx in in_radius:
+            place = place_records[idx]
+            place_id = place_ids[idx]
+            
+            # Parse city/state/zip out of the formatted address. Only US
+            # addresses are recognised; other rows leave these fields blank
+            city, state, zipcode_parsed = '', '', ''
+            address_match = self._us_address_re.search(place.get('formattedAddress', ''))
+            if address_match:
+                city, state, zipcode_parsed = (group or '' for group in address_match.groups())
+            
+            # Build lead data
+            lead_data = {
+                'name': place.get('displayName', {}).get('text', ''),
+                'address': place.get('formattedAddress', ''),
+                'city': city,
+                'state': state,
+                'zip': zipcode_parsed,
+                'phone': place.get('nationalPhoneNumber', ''),
+                'website': place.get('websiteUri', ''),
+                'place_id': place_id,
+                'email': '',
+                'facebook': '',
+                'instagram': '',
+                'linkedin': '',
+                'twitter': ''
+            }
+            
+            leads.append(lead_data)
+        
+        print(f"Found {len(leads)} unique places")
+        return leads
     
     def estimate_cost(self, radius_miles):
         """
         Estimate API cost for a search.
         New Places API pricing is different
         """
-        grid_spacing = 10
-        num_points = max(1, int(radius_miles / grid_spacing)) * 2 + 1
-        num_searches = num_points ** 2
+        # Count the same hex lattice calculate_grid_points searches
+        reach_miles = radius_miles + SEARCH_RADIUS_METERS / METERS_PER_MILE
+        x, y = _hex_grid_offsets(reach_miles, self.grid_spacing_miles())
+        num_searches = int(np.count_nonzero(np.hypot(x, y) <= reach_miles))
         
         estimated_places = num_searches * 10
         
@@ -1,4 +1,5 @@
 import os
+import diskcache
 from fastapi import FastAPI, Form, Request
 from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
@@ -8,6 +9,7 @@ from datetime import datetime
 from .google_places import PlacesSearcher
 from .scraper import WebsiteScraper
 from .sheets_handler import SheetsHandler
+from .seen_places import SeenPlaces
 
 # Load environment variables
 load_dotenv()
@@ -20,6 +22,20 @@ templates = Jinja2Templates(directory="app/templates")
 # Initialize handlers
 GOOGLE_PLACES_API_KEY = os.getenv('GOOGLE_PLACES_API_KEY')
 GOOGLE_SHEET_ID = os.getenv('GOOGLE_SHEET_ID')
+# Optional: path to a SQLite file of exported place_ids; when set, places
+# exported by earlier searches are left out of new results
+SEEN_PLACES_DB = os.getenv('SEEN_PLACES_DB')
+# Optional: directory for caching Places API responses between runs
+PLACES_CACHE_DIR = os.getenv('PLACES_CACHE_DIR')
+
+# Opened once for the app's lifetime and shared by every search
+places_cache = diskcache.Cache(PLACES_CACHE_DIR) if PLACES_CACHE_DIR else None
+
+@app.on_event("shutdown")
+def close_places_cache():
+    """Close the Places response cache's database connections"""
+    if places_cache is not None:
+        places_cache.close()
 
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
@@ -61,7 +77,12 @@ async def run_search(
         print(f"{'='*50}\n")
         
         # Initialize searcher
-        places_searcher = PlacesSearcher(GOOGLE_PLACES_API_KEY)
+        seen_places = SeenPlaces(SEEN_PLACES_DB) if SEEN_PLACES_DB else None
+        places_searcher = PlacesSearcher(
+            GOOGLE_PLACES_API_KEY,
+            seen_places=seen_places,
+            places_cache=places_cache
+        )
         
         # Estimate cost
         estimate = places_searcher.estimate_cost(radius)
@@ -72,6 +93,12 @@ async def run_search(
         print("\nSearching Google Places API...")
         leads = places_searcher.search_area(keyword, zipcode, radius)
         
+        if not leads and places_searcher.skipped_seen:
+            return {
+                "success": False,
+                "error": f"All {places_searcher.skipped_seen} places found were already exported by earlier searches"
+            }
+        
         if not leads:
             return {
                 "success": False,
@@ -84,7 +111,7 @@ async def run_search(
         if scrape_websites:
             print("\nScraping websites for emails and social links...")
             scraper = WebsiteScraper()
-            leads = scraper.scrape_batch(leads, delay=1)
+            leads = await scraper.scrape_batch_async(leads)
             
             # Count how many emails found
             emails_found = sum(1 for lead in leads if lead.get('email'))
@@ -98,10 +125,12 @@ async def run_search(
         timestamp = datetime.now().strftime("%Y%m%d_%H%M")
         tab_name = f"{keyword.replace(' ', '_')}_{zipcode}_{timestamp}"
         
-        # Create new tab and write data
-        sheets_handler.create_new_tab(tab_name)
-        sheets_handler.write_headers(tab_name)
-        sheets_handler.write_data(tab_name, leads)
+        # Create new tab with headers and data
+        written = sheets_handler.write_leads_tab(tab_name, leads)
+        
+        # Remember exported places only once they're actually in the sheet
+        if written and seen_places is not None:
+            seen_places.add(lead['place_id'] for lead in leads)
         
         # Log metadata
         sheets_handler.log_search_metadata(
@@ -1,15 +1,66 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import aiohttp
+import asyncio
+from aiolimiter import AsyncLimiter
+from selectolax.parser import HTMLParser
 import re
 from urllib.parse import urljoin, urlparse
-import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+
+# Number of websites scraped at the same time
+MAX_CONCURRENT_SCRAPES = 20
+
+# Default request rate (requests per second) across a scrape batch
+SCRAPE_RATE_LIMIT = 20
+
+# How often, and for at most how long, to honour a 429 Retry-After
+MAX_RATE_LIMIT_RETRIES = 1
+MAX_RETRY_AFTER_SECONDS = 30
+
+# Only the first part of a page is downloaded and parsed
+MAX_PAGE_BYTES = 512 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# Common contact page URLs, tried in order when the main page has no email
+CONTACT_PATHS = [
+    '/contact',
+    '/contact-us',
+    '/about',
+    '/about-us',
+    '/get-in-touch'
+]
 
 class WebsiteScraper:
+    # Email, mailto and social profile patterns, compiled once for all instances
+    _email_re = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b')
+    _mailto_re = re.compile(r'^mailto:', re.I)
+    _facebook_re = re.compile(r'facebook\.com/[^/\s]+')
+    _instagram_re = re.compile(r'instagram\.com/[^/\s]+')
+    _twitter_re = re.compile(r'(twitter|x)\.com/[^/\s]+')
+    
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         }
         self.timeout = 10
+        
+        # Token bucket shared by a batch's requests, only set while it runs
+        self.limiter = None
+        
+        # Keep-alive connection pool for the sync scraping methods
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        # Filter out common false positives (matched against the domain and its parents)
+        self.excluded_domains = frozenset([
+            'example.com', 'yourdomain.com', 'email.com',
+            'domain.com', 'sentry.io', 'wixpress.com'
+        ])
     
     def scrape_website(self, url):
         """
@@ -24,22 +75,11 @@ class WebsiteScraper:
             url = 'https://' + url
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=self.timeout)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                text = self.read_limited(response)
             
-            # Extract email and socials
-            email = self.find_email(soup, response.text)
-            socials = self.find_social_links(soup, url)
-            
-            return {
-                'email': email,
-                'facebook': socials.get('facebook', ''),
-                'instagram': socials.get('instagram', ''),
-                'linkedin': socials.get('linkedin', ''),
-                'twitter': socials.get('twitter', '')
-            }
+            return self.parse_page(text, url)
             
         except requests.exceptions.Timeout:
             print(f"Timeout scraping {url}")
@@ -51,37 +91,150 @@ class WebsiteScraper:
             print(f"Unexpected error scraping {url}: {e}")
             return None
     
-    def find_email(self, soup, text):
+    async def scrape_website_async(self, session, url):
         """
-        Find email addresses on the page
-        Returns the first valid email found
+        Async version of scrape_website using a shared aiohttp session
+        Returns dict with email and social URLs
+        """
+        if not url:
+            return None
+        
+        # Ensure URL has protocol
+        if not url.startswith('http'):
+            url = 'https://' + url
+        
+        try:
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                await self.throttle()
+                
+                async with session.get(url) as response:
+                    retry_after = self.retry_after_seconds(response)
+                    
+                    if retry_after is None or attempt == MAX_RATE_LIMIT_RETRIES:
+                        response.raise_for_status()
+                        text = await self.read_limited_async(response)
+                        break
+                
+                print(f"Rate limited by {url}, retrying in {retry_after:.0f}s")
+                await asyncio.sleep(retry_after)
+            
+            return self.parse_page(text, url)
+            
+        except asyncio.TimeoutError:
+            print(f"Timeout scraping {url}")
+            return None
+        except aiohttp.ClientError as e:
+            print(f"Error scraping {url}: {e}")
+            return None
+        except Exception as e:
+            print(f"Unexpected error scraping {url}: {e}")
+            return None
+    
+    async def throttle(self):
+        """Wait for a token from the batch rate limiter, if one is active"""
+        if self.limiter is not None:
+            await self.limiter.acquire()
+    
+    def retry_after_seconds(self, response):
+        """
+        Seconds to wait before retrying a 429 response, or None if the
+        response wasn't rate limited
         """
-        # Common email patterns
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
+        if response.status != 429:
+            return None
         
-        # Search in text content
-        emails = re.findall(email_pattern, text)
+        retry_after = response.headers.get('Retry-After', '')
+        
+        try:
+            seconds = float(retry_after)
+        except ValueError:
+            # Retry-After may also be an HTTP date
+            try:
+                retry_at = parsedate_to_datetime(retry_after)
+                seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+            except (TypeError, ValueError):
+                seconds = 1
+        
+        return min(max(seconds, 0), MAX_RETRY_AFTER_SECONDS)
+    
+    def read_limited(self, response):
+        """Read at most MAX_PAGE_BYTES from a streamed requests response"""
+        chunks = []
+        total = 0
+        
+        for chunk in response.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= MAX_PAGE_BYTES:
+                break
+        
+        return b''.join(chunks)[:MAX_PAGE_BYTES].decode(response.encoding or 'utf-8', errors='replace')
+    
+    async def read_limited_async(self, response):
+        """Read at most MAX_PAGE_BYTES from an aiohttp response"""
+        chunks = []
+        total = 0
+        
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= MAX_PAGE_BYTES:
+                break
+        
+        return b''.join(chunks)[:MAX_PAGE_BYTES].decode(response.charset or 'utf-8', errors='replace')
+    
+    def parse_page(self, text, url):
+        """
+        Extract email and social links from a downloaded page
+        Returns dict with email and social URLs
+        """
+        tree = HTMLParser(text)
         
-        # Filter out common false positives
-        excluded_domains = ['example.com', 'yourdomain.com', 'email.com', 
-                          'domain.com', 'sentry.io', 'wixpress.com']
+        # Extract email and socials
+        email = self.find_email(tree, text)
+        socials = self.find_social_links(tree, url)
         
-        for email in emails:
-            domain = email.split('@')[1].lower()
-            if not any(excl in domain for excl in excluded_domains):
+        return {
+            'email': email,
+            'facebook': socials.get('facebook', ''),
+            'instagram': socials.get('instagram', ''),
+            'linkedin': socials.get('linkedin', ''),
+            'twitter': socials.get('twitter', '')
+        }
+    
+    def find_email(self, tree, text):
+        """
+        Find email addresses on the page
+        Returns the first valid email found
+        Pass tree=None to parse the HTML only if the text has no email
+        """
+        # Search in text content, stopping at the first usable match
+        for match in self._email_re.finditer(text):
+            email = match.group(0)
+            if not self.is_excluded_domain(email.split('@')[1]):
                 return email
         
         # Also check mailto links
-        mailto_links = soup.find_all('a', href=re.compile(r'^mailto:', re.I))
-        for link in mailto_links:
-            href = link.get('href', '')
-            email_match = re.search(email_pattern, href)
+        if tree is None:
+            tree = HTMLParser(text)
+        
+        for link in tree.css('a[href]'):
+            href = link.attributes.get('href') or ''
+            if not self._mailto_re.match(href):
+                continue
+            email_match = self._email_re.search(href)
             if email_match:
                 return email_match.group(0)
         
         return ''
     
-    def find_social_links(self, soup, base_url):
+    def is_excluded_domain(self, domain):
+        """Check a domain and each of its parent domains against the exclusion set"""
+        parts = domain.lower().split('.')
+        return any('.'.join(parts[i:]) in self.excluded_domains
+                   for i in range(len(parts) - 1))
+    
+    def find_social_links(self, tree, base_url):
         """
         Find social media profile links
         Returns dict with social platform URLs
@@ -93,35 +246,41 @@ class WebsiteScraper:
             'twitter': ''
         }
         
-        # Find all links
-        links = soup.find_all('a', href=True)
+        filled = 0
         
-        for link in links:
-            href = link.get('href', '').lower()
-            
-            # Make absolute URL
-            absolute_url = urljoin(base_url, href)
+        for link in tree.css('a[href]'):
+            href = (link.attributes.get('href') or '').lower()
+            platform = None
             
-            # Check for each social platform
+            # Check for each platform; cheap substring tests gate the regexes
             if 'facebook.com' in href and not socials['facebook']:
                 # Extract clean Facebook URL
-                if '/pages/' in href or '/profile.php' in href or re.search(r'facebook\.com/[^/\s]+', href):
-                    socials['facebook'] = absolute_url.split('?')[0]  # Remove query params
+                if '/pages/' in href or '/profile.php' in href or self._facebook_re.search(href):
+                    platform = 'facebook'
             
             elif 'instagram.com' in href and not socials['instagram']:
                 # Extract Instagram profile
-                if re.search(r'instagram\.com/[^/\s]+', href):
-                    socials['instagram'] = absolute_url.split('?')[0]
+                if self._instagram_re.search(href):
+                    platform = 'instagram'
             
             elif 'linkedin.com' in href and not socials['linkedin']:
                 # Extract LinkedIn profile or company page
                 if '/company/' in href or '/in/' in href:
-                    socials['linkedin'] = absolute_url.split('?')[0]
+                    platform = 'linkedin'
             
             elif ('twitter.com' in href or 'x.com' in href) and not socials['twitter']:
                 # Extract Twitter/X profile
-                if re.search(r'(twitter|x)\.com/[^/\s]+', href):
-                    socials['twitter'] = absolute_url.split('?')[0]
+                if self._twitter_re.search(href):
+                    platform = 'twitter'
+            
+            if platform:
+                # Make absolute URL and remove query params
+                socials[platform] = urljoin(base_url, href).split('?')[0]
+                filled += 1
+                
+                # Stop once every platform has a link
+                if filled == len(socials):
+                    break
         
         return socials
     
@@ -135,48 +294,65 @@ class WebsiteScraper:
         if not base_url.startswith('http'):
             base_url = 'https://' + base_url
         
-        # Common contact page URLs
-        contact_paths = [
-            '/contact',
-            '/contact-us',
-            '/about',
-            '/about-us',
-            '/get-in-touch'
-        ]
-        
-        for path in contact_paths:
+        for path in CONTACT_PATHS:
             try:
                 contact_url = urljoin(base_url, path)
-                response = requests.get(contact_url, headers=self.headers, timeout=5)
+                with self.session.get(contact_url, timeout=5, stream=True) as response:
+                    if response.status_code != 200:
+                        continue
+                    text = self.read_limited(response)
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    email = self.find_email(soup, response.text)
-                    if email:
-                        return email
+                email = self.find_email(None, text)
+                if email:
+                    return email
                         
             except:
                 continue
         
         return None
     
-    def scrape_batch(self, leads, delay=1):
+    async def scrape_contact_page_async(self, session, base_url):
         """
-        Scrape multiple websites with rate limiting
-        Updates leads list in place
+        Async version of scrape_contact_page using a shared aiohttp session
         """
-        total = len(leads)
+        if not base_url:
+            return None
         
-        for idx, lead in enumerate(leads, 1):
-            website = lead.get('website', '')
-            
-            if not website:
+        if not base_url.startswith('http'):
+            base_url = 'https://' + base_url
+        
+        for path in CONTACT_PATHS:
+            try:
+                contact_url = urljoin(base_url, path)
+                await self.throttle()
+                async with session.get(contact_url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                    if response.status != 200:
+                        continue
+                    text = await self.read_limited_async(response)
+                
+                email = self.find_email(None, text)
+                if email:
+                    return email
+                    
+            except Exception:
                 continue
-            
+        
+        return None
+    
+    async def scrape_lead_async(self, session, semaphore, lead, idx, total):
+        """
+        Scrape a single lead's website and update the lead in place
+        """
+        website = lead.get('website', '')
+        
+        if not website:
+            return
+        
+        async with semaphore:
             print(f"Scraping {idx}/{total}: {website}")
             
             # Scrape main page
-            scraped_data = self.scrape_website(website)
+            scraped_data = await self.scrape_website_async(session, website)
             
             if scraped_data:
                 # Update lead with scraped data
@@ -188,11 +364,41 @@ class WebsiteScraper:
                 
                 # If no email found on main page, try contact page
                 if not lead['email']:
-                    contact_email = self.scrape_contact_page(website)
+                    contact_email = await self.scrape_contact_page_async(session, website)
                     if contact_email:
                         lead['email'] = contact_email
-            
-            # Rate limiting - be respectful
-            time.sleep(delay)
+    
+    async def scrape_batch_async(self, leads, rate_limit=SCRAPE_RATE_LIMIT):
+        """
+        Scrape multiple websites concurrently, paced to rate_limit requests
+        per second across the whole batch
+        Updates leads list in place
+        """
+        total = len(leads)
+        
+        # Rate limiting - be respectful
+        self.limiter = AsyncLimiter(rate_limit, 1)
+        
+        connector = aiohttp.TCPConnector(limit=50, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SCRAPES)
+        
+        try:
+            async with aiohttp.ClientSession(
+                headers=self.headers, connector=connector, timeout=timeout
+            ) as session:
+                await asyncio.gather(*[
+                    self.scrape_lead_async(session, semaphore, lead, idx, total)
+                    for idx, lead in enumerate(leads, 1)
+                ])
+        finally:
+            self.limiter = None
         
-        return leads
\ No newline at end of file
+        return leads
+    
+    def scrape_batch(self, leads, rate_limit=SCRAPE_RATE_LIMIT):
+        """
+        Scrape multiple websites with rate limiting
+        Updates leads list in place
+        """
+        return asyncio.run(self.scrape_batch_async(leads, rate_limit))
\ No newline at end of file
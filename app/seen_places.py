@@ -0,0 +1,46 @@
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+
+# SQLite's default limit on bound parameters is 999
+QUERY_CHUNK_SIZE = 500
+
+class SeenPlaces:
+    """
+    Disk-backed record of place_ids already written to a sheet, so repeat
+    searches over overlapping areas can skip places that were exported before
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS seen (place_id TEXT PRIMARY KEY, ts TEXT)'
+            )
+    
+    def filter_seen(self, place_ids):
+        """Return the subset of place_ids that were recorded before"""
+        seen = set()
+        place_ids = list(place_ids)
+        
+        with closing(sqlite3.connect(self.db_path)) as conn:
+            for start in range(0, len(place_ids), QUERY_CHUNK_SIZE):
+                chunk = place_ids[start:start + QUERY_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT place_id FROM seen WHERE place_id IN ({placeholders})',
+                    chunk
+                )
+                seen.update(row[0] for row in rows)
+        
+        return seen
+    
+    def add(self, place_ids):
+        """Record place_ids as seen"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        
+        with closing(sqlite3.connect(self.db_path)) as conn, conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO seen (place_id, ts) VALUES (?, ?)',
+                [(place_id, timestamp) for place_id in place_ids]
+            )
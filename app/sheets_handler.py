@@ -6,11 +6,31 @@ from googleapiclient.discovery import build
 from datetime import datetime
 import pickle
 import base64
+import random
+import csv
+import io
+from operator import itemgetter
 
 # If modifying these scopes, delete the file token.pickle.
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets', 
           'https://www.googleapis.com/auth/drive.file']
 
+LEAD_HEADERS = [
+    'Name', 'Address', 'City', 'State', 'Zip', 
+    'Phone', 'Website', 'Email', 'Facebook', 
+    'Instagram', 'LinkedIn', 'Twitter', 'Place ID'
+]
+
+# Lead dict keys, in the same order as LEAD_HEADERS
+LEAD_FIELDS = (
+    'name', 'address', 'city', 'state', 'zip',
+    'phone', 'website', 'email', 'facebook',
+    'instagram', 'linkedin', 'twitter', 'place_id'
+)
+
+METADATA_HEADERS = ['Timestamp', 'Keyword', 'Zipcode', 'Radius (mi)', 
+                    'Results', 'Est. Cost', 'Status']
+
 class SheetsHandler:
     def __init__(self, sheet_id):
         self.sheet_id = sheet_id
@@ -62,147 +82,148 @@ class SheetsHandler:
         self.service = build('sheets', 'v4', credentials=creds)
         print("Google Sheets service initialized successfully")
     
-    def create_new_tab(self, tab_name):
-        """Create a new tab/sheet in the spreadsheet"""
-        try:
-            request_body = {
-                'requests': [{
-                    'addSheet': {
-                        'properties': {
-                            'title': tab_name
+    def bold_header_request(self, sheet_id):
+        """Build a batchUpdate request that makes the first row bold"""
+        return {
+            'repeatCell': {
+                'range': {
+                    'sheetId': sheet_id,
+                    'startRowIndex': 0,
+                    'endRowIndex': 1
+                },
+                'cell': {
+                    'userEnteredFormat': {
+                        'textFormat': {
+                            'bold': True
                         }
                     }
-                }]
+                },
+                'fields': 'userEnteredFormat.textFormat.bold'
             }
-            
-            response = self.service.spreadsheets().batchUpdate(
-                spreadsheetId=self.sheet_id,
-                body=request_body
-            ).execute()
-            
-            return response
-        except Exception as e:
-            print(f"Error creating tab: {e}")
-            return None
+        }
     
-    def write_headers(self, tab_name):
-        """Write column headers to the new tab"""
-        headers = [
-            'Name', 'Address', 'City', 'State', 'Zip', 
-            'Phone', 'Website', 'Email', 'Facebook', 
-            'Instagram', 'LinkedIn', 'Twitter', 'Place ID'
-        ]
-        
-        range_name = f"{tab_name}!A1:M1"
+    def add_sheet_request(self, sheet_id, tab_name, row_count=1000):
+        """Build a batchUpdate request that adds a tab with a known sheetId"""
+        return {
+            'addSheet': {
+                'properties': {
+                    'sheetId': sheet_id,
+                    'title': tab_name,
+                    'gridProperties': {
+                        # Big enough for a pasted import, never below the default
+                        'rowCount': max(1000, row_count)
+                    }
+                }
+            }
+        }
+    
+    def plain_text_request(self, sheet_id):
+        """Build a batchUpdate request that formats every cell as plain text"""
+        return {
+            'repeatCell': {
+                'range': {
+                    'sheetId': sheet_id
+                },
+                'cell': {
+                    'userEnteredFormat': {
+                        'numberFormat': {
+                            'type': 'TEXT'
+                        }
+                    }
+                },
+                'fields': 'userEnteredFormat.numberFormat'
+            }
+        }
+    
+    def paste_csv_request(self, sheet_id, rows):
+        """Build a batchUpdate request that pastes rows as CSV starting at A1"""
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerows(rows)
         
-        body = {
-            'values': [headers]
+        return {
+            'pasteData': {
+                'coordinate': {
+                    'sheetId': sheet_id,
+                    'rowIndex': 0,
+                    'columnIndex': 0
+                },
+                'data': buffer.getvalue(),
+                'type': 'PASTE_VALUES',
+                'delimiter': ','
+            }
         }
+    
+    def create_tab_with_rows(self, tab_name, headers, rows):
+        """
+        Create a tab with bold headers and its data.
+        Tries a single batchUpdate that pastes the rows as CSV, and falls
+        back to one batchUpdate plus one values write if that fails.
+        """
+        # Choose the sheetId up front so the new tab can be filled and
+        # formatted in the same batchUpdate that creates it
+        sheet_id = random.randint(1, 2**31 - 1)
         
+        # batchUpdate is atomic, so a failed import leaves nothing behind.
+        # Cells are set to plain text first so the paste keeps values as
+        # RAW would (e.g. leading zeros in zip codes)
         try:
-            self.service.spreadsheets().values().update(
+            self.service.spreadsheets().batchUpdate(
                 spreadsheetId=self.sheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                body=body
+                body={'requests': [
+                    self.add_sheet_request(sheet_id, tab_name, len(rows) + 1),
+                    self.plain_text_request(sheet_id),
+                    self.paste_csv_request(sheet_id, [headers] + rows),
+                    self.bold_header_request(sheet_id)
+                ]}
             ).execute()
             
-            # Format headers (bold)
-            self.format_headers(tab_name)
-            
             return True
         except Exception as e:
-            print(f"Error writing headers: {e}")
-            return False
-    
-    def format_headers(self, tab_name):
-        """Make headers bold"""
+            print(f"CSV import failed for {tab_name}, writing values instead: {e}")
+        
         try:
-            # Get sheet ID by name
-            sheet_metadata = self.service.spreadsheets().get(
-                spreadsheetId=self.sheet_id
+            self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.sheet_id,
+                body={'requests': [
+                    self.add_sheet_request(sheet_id, tab_name),
+                    self.bold_header_request(sheet_id)
+                ]}
             ).execute()
             
-            sheet_id = None
-            for sheet in sheet_metadata.get('sheets', []):
-                if sheet['properties']['title'] == tab_name:
-                    sheet_id = sheet['properties']['sheetId']
-                    break
-            
-            if sheet_id is None:
-                return
-            
-            requests = [{
-                'repeatCell': {
-                    'range': {
-                        'sheetId': sheet_id,
-                        'startRowIndex': 0,
-                        'endRowIndex': 1
-                    },
-                    'cell': {
-                        'userEnteredFormat': {
-                            'textFormat': {
-                                'bold': True
-                            }
-                        }
-                    },
-                    'fields': 'userEnteredFormat.textFormat.bold'
-                }
-            }]
-            
-            body = {'requests': requests}
-            self.service.spreadsheets().batchUpdate(
+            self.service.spreadsheets().values().batchUpdate(
                 spreadsheetId=self.sheet_id,
-                body=body
+                body={
+                    'valueInputOption': 'RAW',
+                    'data': [
+                        {'range': f"{tab_name}!A1", 'values': [headers]},
+                        {'range': f"{tab_name}!A2", 'values': rows}
+                    ]
+                }
             ).execute()
             
+            return True
         except Exception as e:
-            print(f"Error formatting headers: {e}")
-    
-    def write_data(self, tab_name, data):
-        """Write lead data to the sheet"""
-        if not data:
+            print(f"Error creating tab {tab_name}: {e}")
             return False
+    
+    def write_leads_tab(self, tab_name, data):
+        """Create a new tab containing headers and lead data"""
+        return self.create_tab_with_rows(tab_name, LEAD_HEADERS, self.leads_to_rows(data))
+    
+    def leads_to_rows(self, data):
+        """Convert lead dicts to sheet rows in LEAD_HEADERS order"""
+        get_row = itemgetter(*LEAD_FIELDS)
         
-        # Convert data to rows
         rows = []
         for lead in data:
-            row = [
-                lead.get('name', ''),
-                lead.get('address', ''),
-                lead.get('city', ''),
-                lead.get('state', ''),
-                lead.get('zip', ''),
-                lead.get('phone', ''),
-                lead.get('website', ''),
-                lead.get('email', ''),
-                lead.get('facebook', ''),
-                lead.get('instagram', ''),
-                lead.get('linkedin', ''),
-                lead.get('twitter', ''),
-                lead.get('place_id', '')
-            ]
-            rows.append(row)
-        
-        range_name = f"{tab_name}!A2"  # Start at row 2 (after headers)
-        
-        body = {
-            'values': rows
-        }
+            try:
+                # Leads from search_area carry every field, so one C-level
+                # lookup per lead covers the common case
+                rows.append(list(get_row(lead)))
+            except KeyError:
+                rows.append([lead.get(field, '') for field in LEAD_FIELDS])
         
-        try:
-            self.service.spreadsheets().values().append(
-                spreadsheetId=self.sheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                insertDataOption='INSERT_ROWS',
-                body=body
-            ).execute()
-            
-            return True
-        except Exception as e:
-            print(f"Error writing data: {e}")
-            return False
+        return rows
     
     def log_search_metadata(self, keyword, zipcode, radius, result_count, estimated_cost):
         """Log search info to Metadata tab"""
@@ -218,27 +239,8 @@ class SheetsHandler:
             "Complete"
         ]
         
-        # Check if Metadata tab exists, create if not
-        try:
-            range_name = "Metadata!A1"
-            self.service.spreadsheets().values().get(
-                spreadsheetId=self.sheet_id,
-                range=range_name
-            ).execute()
-        except:
-            # Create Metadata tab and add headers
-            self.create_new_tab("Metadata")
-            headers = ['Timestamp', 'Keyword', 'Zipcode', 'Radius (mi)', 
-                      'Results', 'Est. Cost', 'Status']
-            self.service.spreadsheets().values().update(
-                spreadsheetId=self.sheet_id,
-                range="Metadata!A1:G1",
-                valueInputOption='RAW',
-                body={'values': [headers]}
-            ).execute()
-            self.format_headers("Metadata")
-        
-        # Append the search log
+        # Append the search log; if the Metadata tab doesn't exist yet,
+        # create it with headers and this first row instead
         try:
             self.service.spreadsheets().values().append(
                 spreadsheetId=self.sheet_id,
@@ -248,4 +250,5 @@ class SheetsHandler:
                 body={'values': [row]}
             ).execute()
         except Exception as e:
-            print(f"Error logging metadata: {e}")
\ No newline at end of file
+            print(f"Metadata tab not available ({e}), creating it")
+            self.create_tab_with_rows("Metadata", METADATA_HEADERS, [row])
\ No newline at end of file